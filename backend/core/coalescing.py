@@ -0,0 +1,137 @@
+import asyncio
+import threading
+import time
+from django.http import HttpResponse
+
+
+class CoalescingStats:
+    """Process-wide counters for RequestCoalescingMiddleware"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = 0
+            self.computed = 0
+            self.coalesced = 0
+            self.waited_seconds = 0.0
+
+    def record_computed(self):
+        with self._lock:
+            self.requests += 1
+            self.computed += 1
+
+    def record_coalesced(self, waited):
+        with self._lock:
+            self.requests += 1
+            self.coalesced += 1
+            self.waited_seconds += waited
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'computed': self.computed,
+                'coalesced': self.coalesced,
+                'hit_rate': self.coalesced / self.requests if self.requests else 0.0,
+                # Time coalesced requests spent waiting on a shared computation
+                'waited_seconds': round(self.waited_seconds, 3),
+            }
+
+
+stats = CoalescingStats()
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.response = None
+        self.error = None
+
+
+class SingleFlight:
+    """Runs one computation per key at a time; concurrent callers with the same key share its result.
+
+    Returns ``(response, shared, elapsed)``, where ``shared`` is True for callers
+    that waited on another thread's computation. ``elapsed`` is how long the caller
+    spent in ``do``, computing or waiting.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        start = time.perf_counter()
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.response, True, time.perf_counter() - start
+
+        try:
+            call.response = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.response, False, time.perf_counter() - start
+
+
+class AsyncSingleFlight:
+    """asyncio counterpart of SingleFlight for the ASGI request path"""
+
+    def __init__(self):
+        self._calls = {}
+
+    async def do(self, key, fn):
+        start = time.perf_counter()
+        future = self._calls.get(key)
+        if future is not None:
+            try:
+                response = await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                # The leading request was cancelled, compute it ourselves
+                return await self.do(key, fn)
+            return response, True, time.perf_counter() - start
+
+        future = self._calls[key] = asyncio.get_running_loop().create_future()
+        try:
+            response = await fn()
+            future.set_result(response)
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else was waiting
+            future.exception()
+            raise
+        finally:
+            del self._calls[key]
+            if not future.done():
+                future.cancel()
+        return response, False, time.perf_counter() - start
+
+
+def clone_response(response):
+    """Copy a rendered response so each coalesced request gets its own object.
+
+    Returns None for streaming responses, which can only be consumed once.
+    """
+    if response.streaming:
+        return None
+    clone = HttpResponse(response.content, status=response.status_code)
+    for header, value in response.items():
+        clone[header] = value
+    return clone
@@ -0,0 +1,112 @@
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class GzipCompressor:
+    def __init__(self):
+        self._obj = zlib.compressobj(6, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self._obj.compress(data) + self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._obj.flush(zlib.Z_FINISH)
+
+
+class BrotliCompressor:
+    def __init__(self):
+        # Quality 5 is the usual sweet spot for dynamic responses
+        self._obj = brotli.Compressor(mode=brotli.MODE_TEXT, quality=5)
+
+    def compress(self, data):
+        return self._obj.process(data) + self._obj.flush()
+
+    def finish(self):
+        return self._obj.finish()
+
+
+class ZstdCompressor:
+    def __init__(self):
+        self._obj = zstandard.ZstdCompressor(level=3).compressobj()
+
+    def compress(self, data):
+        return self._obj.compress(data) + self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self):
+        return self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_FINISH)
+
+
+# Content-Encoding token -> compressor, in order of server preference
+COMPRESSORS = {}
+if zstandard is not None:
+    COMPRESSORS['zstd'] = ZstdCompressor
+if brotli is not None:
+    COMPRESSORS['br'] = BrotliCompressor
+COMPRESSORS['gzip'] = GzipCompressor
+
+
+def compress(encoding, data):
+    compressor = COMPRESSORS[encoding]()
+    return compressor.compress(data) + compressor.finish()
+
+
+def compress_sequence(encoding, sequence):
+    compressor = COMPRESSORS[encoding]()
+    for chunk in sequence:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+async def compress_async_sequence(encoding, sequence):
+    compressor = COMPRESSORS[encoding]()
+    async for chunk in sequence:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+def is_compressible(content_type, media_types):
+    media_type = content_type.split(';')[0].strip().lower()
+    return media_type in media_types
+
+
+def negotiate_encoding(accept_encoding, available):
+    """Pick the coding from `available` the client prefers most in an Accept-Encoding header.
+
+    Ties go to the order of `available`. Returns None when nothing acceptable is left,
+    in which case the response is sent uncompressed.
+    """
+    weights = {}
+    for item in accept_encoding.split(','):
+        coding, _, params = item.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        weight = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[coding] = weight
+
+    best, best_weight = None, 0.0
+    for coding in available:
+        weight = weights.get(coding, weights.get('*', 0.0))
+        if weight > best_weight:
+            best, best_weight = coding, weight
+    return best
@@ -0,0 +1,28 @@
+from contextvars import ContextVar
+
+# Alias the current request is allowed to read from. Set by
+# core.middleware.ReplicaRoutingMiddleware, None means the primary.
+read_alias = ContextVar('read_alias', default=None)
+
+
+def replica_reads(view):
+    """Mark a function-based view as safe to serve GET requests from a read replica.
+
+    Class-based views opt in with ``use_read_replica = True`` instead.
+    """
+    view.use_read_replica = True
+    return view
+
+
+class PrimaryReplicaRouter:
+    """Send reads to the replica picked for this request, everything else to the primary"""
+
+    def db_for_read(self, model, **hints):
+        return read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
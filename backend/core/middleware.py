@@ -0,0 +1,246 @@
+import hashlib
+import random
+import time
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.urls import Resolver404, resolve
+from django.utils.cache import cc_delim_re, patch_vary_headers
+from . import compression
+from .coalescing import AsyncSingleFlight, SingleFlight, clone_response, stats
+from .db_routers import read_alias
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Request headers that are part of the coalescing key, matched case-insensitively
+COALESCE_KEY_HEADERS = ('Authorization', 'Accept', 'Accept-Language')
+
+
+def is_pinned_to_primary(request):
+    pinned_until = request.COOKIES.get(settings.PRIMARY_STICKY_COOKIE)
+    try:
+        return pinned_until is not None and float(pinned_until) > time.time()
+    except ValueError:
+        return False
+
+
+class ReplicaRoutingMiddleware:
+    """Route reads of opted-in views to a replica, with read-your-writes stickiness.
+
+    Any write pins the client to the primary for PRIMARY_STICKY_WINDOW through a
+    cookie, so a user never reads back stale data from a lagging replica.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        token = read_alias.set(None)
+        try:
+            response = self.get_response(request)
+        finally:
+            read_alias.reset(token)
+        return self.pin_after_write(request, response)
+
+    async def __acall__(self, request):
+        token = read_alias.set(None)
+        try:
+            response = await self.get_response(request)
+        finally:
+            read_alias.reset(token)
+        return self.pin_after_write(request, response)
+
+    def pin_after_write(self, request, response):
+        if request.method not in SAFE_METHODS:
+            window = settings.PRIMARY_STICKY_WINDOW.total_seconds()
+            response.set_cookie(
+                settings.PRIMARY_STICKY_COOKIE,
+                str(int(time.time() + window)),
+                max_age=int(window),
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not settings.DATABASE_REPLICAS or request.method not in SAFE_METHODS:
+            return None
+        view_class = getattr(view_func, 'cls', None)
+        if not (getattr(view_func, 'use_read_replica', False)
+                or getattr(view_class, 'use_read_replica', False)):
+            return None
+        if is_pinned_to_primary(request):
+            return None
+        read_alias.set(random.choice(settings.DATABASE_REPLICAS))
+        return None
+
+
+class RequestCoalescingMiddleware:
+    """Share one response among concurrent identical GET requests to opted-in views.
+
+    Views opt in with ``coalesce_requests = True``. Requests are identical when
+    they have the same path, query string, credentials and content negotiation
+    headers, so a response is only ever shared with callers that would be allowed
+    to see it, in the representation they asked for.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+            self.flight = AsyncSingleFlight()
+        else:
+            self.flight = SingleFlight()
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        key = self.coalesce_key(request)
+        if key is None:
+            return self.get_response(request)
+
+        def compute():
+            response = self.get_response(request)
+            return response, clone_response(response)
+
+        (response, shared_copy), shared, elapsed = self.flight.do(key, compute)
+        if not shared:
+            stats.record_computed()
+            return response
+        shared_response = self.follower_response(shared_copy, elapsed)
+        if shared_response is None:
+            stats.record_computed()
+            return self.get_response(request)
+        return shared_response
+
+    async def __acall__(self, request):
+        key = self.coalesce_key(request)
+        if key is None:
+            return await self.get_response(request)
+
+        async def compute():
+            response = await self.get_response(request)
+            return response, clone_response(response)
+
+        (response, shared_copy), shared, elapsed = await self.flight.do(key, compute)
+        if not shared:
+            stats.record_computed()
+            return response
+        shared_response = self.follower_response(shared_copy, elapsed)
+        if shared_response is None:
+            stats.record_computed()
+            return await self.get_response(request)
+        return shared_response
+
+    def follower_response(self, shared_copy, waited):
+        # Streaming responses cannot be shared, and a response that varies on a
+        # header outside the key may not fit this caller, so it computes its own
+        if shared_copy is None or self.varies_outside_key(shared_copy):
+            return None
+        stats.record_coalesced(waited)
+        return clone_response(shared_copy)
+
+    def coalesce_key(self, request):
+        if request.method != 'GET':
+            return None
+        try:
+            match = resolve(request.path_info, getattr(request, 'urlconf', None))
+        except Resolver404:
+            return None
+        view_class = getattr(match.func, 'cls', None)
+        if not (getattr(match.func, 'coalesce_requests', False)
+                or getattr(view_class, 'coalesce_requests', False)):
+            return None
+
+        headers = '\n'.join(request.headers.get(name, '') for name in COALESCE_KEY_HEADERS)
+        return (
+            request.path_info,
+            tuple(sorted((name, tuple(values)) for name, values in request.GET.lists())),
+            hashlib.sha256(headers.encode()).hexdigest(),
+            is_pinned_to_primary(request),
+        )
+
+    def varies_outside_key(self, response):
+        if not response.has_header('Vary'):
+            return False
+        keyed = {name.lower() for name in COALESCE_KEY_HEADERS}
+        varies_on = {name.lower() for name in cc_delim_re.split(response['Vary']) if name}
+        return not varies_on <= keyed
+
+
+class CompressionMiddleware:
+    """Compress responses with the best of zstd, br or gzip the client accepts.
+
+    Only COMPRESSION_MEDIA_TYPES are compressed, and bodies smaller than
+    COMPRESSION_MIN_SIZE are sent as is. Streaming responses are compressed chunk
+    by chunk so they keep streaming; those of unknown length always qualify.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        return self.compress_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.compress_response(request, await self.get_response(request))
+
+    def compress_response(self, request, response):
+        if response.has_header('Content-Encoding'):
+            return response
+        content_type = response.get('Content-Type', '')
+        if not compression.is_compressible(content_type, settings.COMPRESSION_MEDIA_TYPES):
+            return response
+        if response.streaming:
+            size = response.get('Content-Length')
+        else:
+            size = len(response.content)
+        if size is not None and int(size) < settings.COMPRESSION_MIN_SIZE:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = compression.negotiate_encoding(
+            request.META.get('HTTP_ACCEPT_ENCODING', ''),
+            compression.COMPRESSORS,
+        )
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = compression.compress_async_sequence(
+                    encoding, response.streaming_content)
+            else:
+                response.streaming_content = compression.compress_sequence(
+                    encoding, response.streaming_content)
+            # The compressed length is not known up front
+            del response['Content-Length']
+        else:
+            compressed = compression.compress(encoding, response.content)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        # The body differs per encoding, so a strong ETag no longer holds
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
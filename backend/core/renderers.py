@@ -0,0 +1,55 @@
+import math
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+SCALAR_TYPES = {str, int, bool, type(None)}
+
+
+def has_non_finite(value):
+    """Whether nested dicts/lists/tuples contain NaN or infinity, which orjson would render as null"""
+    for item in (value.values() if isinstance(value, dict) else value):
+        if type(item) in SCALAR_TYPES:
+            continue
+        if isinstance(item, float):
+            if not math.isfinite(item):
+                return True
+        elif isinstance(item, (dict, list, tuple)) and has_non_finite(item):
+            return True
+    return False
+
+
+class ORJSONRenderer(JSONRenderer):
+    """JSONRenderer backed by orjson, falling back to the stdlib encoder when it is not installed.
+
+    Anything orjson would render differently from JSONRenderer also goes through
+    the stdlib encoder: indented output (as requested by the browsable API),
+    NaN/infinity (rejected under STRICT_JSON) and integers wider than 64 bits.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        if has_non_finite([data]):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # orjson handles datetimes, UUIDs and dict/list subclasses natively,
+        # DRF's encoder covers the rest (Decimal, lazy strings, querysets...)
+        try:
+            ret = orjson.dumps(
+                data,
+                default=JSONEncoder().default,
+                option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS,
+            )
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Escape the line and paragraph separators like JSONRenderer does, so
+        # the output stays a valid JavaScript subset
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
@@ -54,6 +54,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -61,6 +62,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.RequestCoalescingMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
 ]
 
 ROOT_URLCONF = 'core.urls'
@@ -93,6 +96,23 @@ DATABASES = {
     }
 }
 
+# Read replicas. Comma separated SQLite paths, e.g.
+# DATABASE_REPLICA_PATHS=db.replica.sqlite3 to try the routing locally
+# against a copy of db.sqlite3.
+for index, replica_path in enumerate(filter(None, os.environ.get('DATABASE_REPLICA_PATHS', '').split(','))):
+    DATABASES[f'replica{index + 1}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / replica_path,
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['core.db_routers.PrimaryReplicaRouter']
+
+# After a write the client reads from the primary for this long
+PRIMARY_STICKY_WINDOW = timedelta(seconds=10)
+PRIMARY_STICKY_COOKIE = 'primary_pin'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -149,9 +169,27 @@ REST_FRAMEWORK = {
     ],
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
-    ]
+    ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    # Leave datetimes to the renderer, ORJSONRenderer encodes them natively
+    'DATETIME_FORMAT': None,
+    'DEFAULT_PARSER_CLASSES': [
+        'core.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
 
+# Responses smaller than this many bytes are not compressed
+COMPRESSION_MIN_SIZE = 1024
+
+# Only API payloads are compressed. HTML pages such as the admin carry CSRF
+# tokens next to reflected input, which compression would expose to BREACH.
+COMPRESSION_MEDIA_TYPES = ['application/json']
+
 # JWT settings
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=7),
@@ -160,5 +198,10 @@ SIMPLE_JWT = {
     'BLACKLIST_AFTER_ROTATION': True,
 }
 
+# Task archival settings
+# Done tasks untouched for longer than this are moved to the archive tables
+TASK_ARCHIVE_AFTER = timedelta(days=90)
+TASK_ARCHIVE_BATCH_SIZE = 500
+
 # CORS settings
 CORS_ALLOW_ALL_ORIGINS = True  # For development only, restrict in production
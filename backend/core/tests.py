@@ -0,0 +1,379 @@
+import asyncio
+import gzip
+import threading
+import time
+from datetime import datetime, timezone
+from unittest import mock
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TransactionTestCase, override_settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from teams.models import Team, TeamMembership
+from . import compression
+from .coalescing import AsyncSingleFlight, SingleFlight
+from .db_routers import PrimaryReplicaRouter, read_alias
+from .middleware import CompressionMiddleware, RequestCoalescingMiddleware
+from .renderers import ORJSONRenderer
+
+
+class SingleFlightTests(SimpleTestCase):
+    def run_concurrently(self, flight, fn, callers=5):
+        results = []
+        errors = []
+
+        def call():
+            try:
+                results.append(flight.do('key', fn))
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=call) for _ in range(callers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results, errors
+
+    def test_concurrent_callers_share_one_computation(self):
+        flight = SingleFlight()
+        calls = []
+
+        def fn():
+            calls.append(1)
+            time.sleep(0.2)
+            return 'response'
+
+        results, errors = self.run_concurrently(flight, fn)
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(calls), 1)
+        self.assertEqual([response for response, shared, elapsed in results], ['response'] * 5)
+        self.assertEqual(sorted(shared for response, shared, elapsed in results), [False] + [True] * 4)
+
+    def test_leader_error_reaches_followers(self):
+        flight = SingleFlight()
+
+        def fn():
+            time.sleep(0.2)
+            raise ValueError('boom')
+
+        results, errors = self.run_concurrently(flight, fn)
+
+        self.assertEqual(results, [])
+        self.assertEqual(len(errors), 5)
+        self.assertTrue(all(isinstance(error, ValueError) for error in errors))
+
+    def test_next_call_after_completion_computes_again(self):
+        flight = SingleFlight()
+
+        self.assertEqual(flight.do('key', lambda: 1)[:2], (1, False))
+        self.assertEqual(flight.do('key', lambda: 2)[:2], (2, False))
+
+    def test_different_keys_do_not_share(self):
+        flight = SingleFlight()
+
+        self.assertEqual(flight.do('a', lambda: 'a')[0], 'a')
+        self.assertEqual(flight.do('b', lambda: 'b')[0], 'b')
+
+
+class AsyncSingleFlightTests(SimpleTestCase):
+    async def test_concurrent_callers_share_one_computation(self):
+        flight = AsyncSingleFlight()
+        calls = []
+
+        async def fn():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return 'response'
+
+        results = await asyncio.gather(*[flight.do('key', fn) for _ in range(5)])
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual([response for response, shared, elapsed in results], ['response'] * 5)
+        self.assertEqual([shared for response, shared, elapsed in results], [False] + [True] * 4)
+
+    async def test_leader_error_reaches_followers(self):
+        flight = AsyncSingleFlight()
+
+        async def fn():
+            await asyncio.sleep(0.05)
+            raise ValueError('boom')
+
+        results = await asyncio.gather(*[flight.do('key', fn) for _ in range(3)], return_exceptions=True)
+
+        self.assertEqual(len(results), 3)
+        self.assertTrue(all(isinstance(result, ValueError) for result in results))
+
+    async def test_follower_recomputes_when_leader_is_cancelled(self):
+        flight = AsyncSingleFlight()
+        calls = []
+
+        async def fn():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return 'response'
+
+        leader = asyncio.create_task(flight.do('key', fn))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do('key', fn))
+        await asyncio.sleep(0)
+        leader.cancel()
+
+        response, shared, elapsed = await follower
+
+        self.assertTrue(leader.cancelled())
+        self.assertEqual(response, 'response')
+        self.assertFalse(shared)
+        self.assertEqual(len(calls), 2)
+
+    async def test_cancelled_follower_does_not_cancel_leader(self):
+        flight = AsyncSingleFlight()
+
+        async def fn():
+            await asyncio.sleep(0.05)
+            return 'response'
+
+        leader = asyncio.create_task(flight.do('key', fn))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do('key', fn))
+        await asyncio.sleep(0)
+        follower.cancel()
+
+        self.assertEqual((await leader)[:2], ('response', False))
+        self.assertTrue(follower.cancelled())
+
+
+class CoalesceKeyTests(SimpleTestCase):
+    def setUp(self):
+        self.middleware = RequestCoalescingMiddleware(lambda request: HttpResponse())
+        self.factory = RequestFactory()
+
+    def key(self, path='/api/teams/', **headers):
+        return self.middleware.coalesce_key(self.factory.get(path, **headers))
+
+    def test_identical_requests_share_a_key(self):
+        key = self.key('/api/tasks/?team=1&status=done', HTTP_AUTHORIZATION='Bearer a')
+        self.assertIsNotNone(key)
+        self.assertEqual(key, self.key('/api/tasks/?status=done&team=1', HTTP_AUTHORIZATION='Bearer a'))
+
+    def test_credentials_and_negotiation_headers_are_keyed(self):
+        base = self.key(HTTP_AUTHORIZATION='Bearer a', HTTP_ACCEPT='application/json')
+        self.assertNotEqual(base, self.key(HTTP_AUTHORIZATION='Bearer b', HTTP_ACCEPT='application/json'))
+        self.assertNotEqual(base, self.key(HTTP_AUTHORIZATION='Bearer a', HTTP_ACCEPT='text/html'))
+        self.assertNotEqual(base, self.key(
+            HTTP_AUTHORIZATION='Bearer a', HTTP_ACCEPT='application/json', HTTP_ACCEPT_LANGUAGE='fr'))
+
+    def test_views_that_do_not_opt_in_are_not_coalesced(self):
+        self.assertIsNone(self.key('/api/users/search/'))
+        self.assertIsNone(self.middleware.coalesce_key(self.factory.post('/api/teams/')))
+
+    def test_response_varying_outside_the_key_is_not_shared(self):
+        response = HttpResponse()
+        response['Vary'] = 'Accept, Accept-Language'
+        self.assertFalse(self.middleware.varies_outside_key(response))
+        response['Vary'] = 'Accept, Cookie'
+        self.assertTrue(self.middleware.varies_outside_key(response))
+
+
+class PrimaryReplicaRouterTests(SimpleTestCase):
+    def test_reads_follow_the_request_alias_and_writes_go_to_default(self):
+        router = PrimaryReplicaRouter()
+        self.assertIsNone(router.db_for_read(Team))
+
+        token = read_alias.set('replica1')
+        try:
+            self.assertEqual(router.db_for_read(Team), 'replica1')
+            self.assertEqual(router.db_for_write(Team), 'default')
+        finally:
+            read_alias.reset(token)
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'])
+class ReplicaRoutingMiddlewareTests(TransactionTestCase):
+    # Run the suite with DATABASE_REPLICA_PATHS set to route to a real SQLite
+    # replica, which only sees committed rows. Without it the router is spied
+    # on and reads stay on default.
+    databases = '__all__'
+
+    def setUp(self):
+        self.user = User.objects.create_user('alice', password='secret-pass')
+        self.team = Team.objects.create(name='Platform', created_by=self.user)
+        TeamMembership.objects.create(team=self.team, user=self.user, role='admin')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.reads = []
+
+        def record_read(router, model, **hints):
+            alias = read_alias.get()
+            self.reads.append(alias)
+            return alias if alias in settings.DATABASES else None
+
+        patcher = mock.patch.object(PrimaryReplicaRouter, 'db_for_read', record_read)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_opted_in_gets_read_from_a_replica(self):
+        for path in ['/api/teams/', '/api/tasks/', '/api/users/search/?query=ali']:
+            self.reads.clear()
+            self.assertEqual(self.client.get(path).status_code, 200)
+            self.assertTrue(self.reads, path)
+            self.assertEqual(set(self.reads), {'replica1'}, path)
+
+    def test_other_views_and_writes_stay_on_the_primary(self):
+        self.assertEqual(self.client.get('/api/users/profile/').status_code, 200)
+        response = self.client.post(f'/api/teams/{self.team.id}/members/', {'user': self.user.id})
+        self.assertEqual(response.status_code, 400)
+
+        self.assertTrue(self.reads)
+        self.assertEqual(set(self.reads), {None})
+
+    def test_write_pins_the_client_to_the_primary(self):
+        response = self.client.post('/api/teams/', {'name': 'Design'})
+
+        self.assertEqual(response.status_code, 201)
+        cookie = response.cookies[settings.PRIMARY_STICKY_COOKIE]
+        self.assertEqual(cookie['max-age'], int(settings.PRIMARY_STICKY_WINDOW.total_seconds()))
+        self.assertGreater(float(cookie.value), time.time())
+
+        self.reads.clear()
+        response = self.client.get('/api/teams/')
+        self.assertEqual(len(response.json()), 2)
+        self.assertEqual(set(self.reads), {None})
+
+    def test_expired_pin_reads_from_a_replica_again(self):
+        self.client.cookies[settings.PRIMARY_STICKY_COOKIE] = str(int(time.time()) - 1)
+
+        self.client.get('/api/teams/')
+
+        self.assertEqual(set(self.reads), {'replica1'})
+
+
+class ORJSONRendererTests(SimpleTestCase):
+    def assertRendersLikeJSONRenderer(self, data):
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_matches_json_renderer(self):
+        self.assertRendersLikeJSONRenderer([{'id': 1, 'title': 'Täsk', 'due_date': None, 'tags': ('a', 'b')}])
+        self.assertRendersLikeJSONRenderer({'count': 3, 'ratio': 0.5})
+
+    def test_datetimes_render_like_json_renderer(self):
+        self.assertRendersLikeJSONRenderer({
+            'created_at': datetime(2025, 1, 6, 9, 30, 15, 123456, tzinfo=timezone.utc),
+            'due_date': datetime(2025, 1, 13, 9, 0, tzinfo=timezone.utc),
+        })
+
+    def test_line_and_paragraph_separators_are_escaped(self):
+        data = {'title': 'line\u2028paragraph\u2029end'}
+        self.assertRendersLikeJSONRenderer(data)
+        self.assertIn(b'\\u2028', ORJSONRenderer().render(data))
+        self.assertIn(b'\\u2029', ORJSONRenderer().render(data))
+
+    def test_non_finite_floats_are_rejected_under_strict_json(self):
+        for value in [float('nan'), float('inf'), float('-inf')]:
+            with self.assertRaises(ValueError):
+                ORJSONRenderer().render({'nested': [{'value': value}]})
+
+    def test_integers_wider_than_64_bits_fall_back(self):
+        self.assertRendersLikeJSONRenderer({'big': 2 ** 70, 'negative': -2 ** 70})
+
+
+class NegotiateEncodingTests(SimpleTestCase):
+    available = ['zstd', 'br', 'gzip']
+
+    def test_server_preference_breaks_ties(self):
+        self.assertEqual(compression.negotiate_encoding('gzip, br, zstd', self.available), 'zstd')
+        self.assertEqual(compression.negotiate_encoding('gzip, br', self.available), 'br')
+
+    def test_q_values_win_over_server_preference(self):
+        self.assertEqual(compression.negotiate_encoding('zstd;q=0.5, gzip;q=0.9', self.available), 'gzip')
+
+    def test_wildcard_and_q_zero(self):
+        self.assertEqual(compression.negotiate_encoding('*', self.available), 'zstd')
+        self.assertEqual(compression.negotiate_encoding('*;q=0.5, zstd;q=0', self.available), 'br')
+        self.assertIsNone(compression.negotiate_encoding('gzip;q=0', self.available))
+
+    def test_codings_are_case_insensitive(self):
+        self.assertEqual(compression.negotiate_encoding('GZip; Q=1, BR;q=0.1', self.available), 'gzip')
+
+    def test_nothing_acceptable(self):
+        self.assertIsNone(compression.negotiate_encoding('', self.available))
+        self.assertIsNone(compression.negotiate_encoding('identity', self.available))
+
+
+@override_settings(COMPRESSION_MIN_SIZE=100, COMPRESSION_MEDIA_TYPES=['application/json'])
+class CompressionMiddlewareTests(SimpleTestCase):
+    body = b'{"title": "Task"}' * 50
+
+    def compress(self, response, accept_encoding='gzip'):
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING=accept_encoding)
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def json_response(self, body=None, **kwargs):
+        return HttpResponse(self.body if body is None else body, content_type='application/json', **kwargs)
+
+    def test_compresses_json(self):
+        response = self.compress(self.json_response())
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(int(response['Content-Length']), len(response.content))
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(gzip.decompress(response.content), self.body)
+
+    def test_small_bodies_are_sent_as_is(self):
+        response = self.compress(self.json_response(b'{}'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+        response = self.compress(self.json_response(b'{}' * 100))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+
+    def test_only_allowed_media_types_are_compressed(self):
+        for content_type in ['image/png', 'application/zip', 'text/html; charset=utf-8']:
+            response = self.compress(HttpResponse(self.body, content_type=content_type))
+            self.assertFalse(response.has_header('Content-Encoding'), content_type)
+            self.assertEqual(response.content, self.body)
+
+    def test_already_encoded_responses_are_left_alone(self):
+        response = self.json_response(headers={'Content-Encoding': 'br'})
+        self.assertEqual(self.compress(response).content, self.body)
+
+    def test_strong_etag_is_weakened(self):
+        response = self.compress(self.json_response(headers={'ETag': '"abc"'}))
+        self.assertEqual(response['ETag'], 'W/"abc"')
+
+    def test_every_available_encoding_round_trips(self):
+        for encoding, compressor in compression.COMPRESSORS.items():
+            response = self.compress(self.json_response(), accept_encoding=encoding)
+            self.assertEqual(response['Content-Encoding'], encoding)
+            self.assertEqual(response.content, compression.compress(encoding, self.body))
+
+    def test_streaming_response(self):
+        chunks = [self.body[:400], self.body[400:]]
+        response = self.compress(StreamingHttpResponse(iter(chunks), content_type='application/json'))
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertFalse(response.has_header('Content-Length'))
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), self.body)
+
+    def test_small_streaming_response_with_length_is_sent_as_is(self):
+        response = StreamingHttpResponse(iter([b'{}']), content_type='application/json')
+        response['Content-Length'] = '2'
+        self.assertFalse(self.compress(response).has_header('Content-Encoding'))
+
+    async def test_async_streaming_response(self):
+        chunks = [self.body[:400], self.body[400:]]
+
+        async def stream():
+            for chunk in chunks:
+                yield chunk
+
+        async def get_response(request):
+            return StreamingHttpResponse(stream(), content_type='application/json')
+
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip')
+        response = await CompressionMiddleware(get_response)(request)
+        body = b''.join([chunk async for chunk in response.streaming_content])
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(body), self.body)
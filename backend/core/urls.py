@@ -9,6 +9,7 @@ from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
 )
+from .views import coalescing_stats
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -17,6 +18,7 @@ urlpatterns = [
     path('api/teams/', include('teams.urls')),
     path('api/tasks/', include('tasks.urls')),
     path('api/users/', include('users.urls')),
+    path('api/coalescing-stats/', coalescing_stats, name='coalescing_stats'),
 ]
 
 if settings.DEBUG:
@@ -0,0 +1,11 @@
+from rest_framework import permissions
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+from .coalescing import stats
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def coalescing_stats(request):
+    """Hit rate and wait time of request coalescing in this process"""
+    return Response(stats.snapshot())
@@ -0,0 +1,71 @@
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from .models import Task, Comment, ArchivedTask, ArchivedComment
+
+TASK_FIELDS = [
+    'id', 'title', 'description', 'status', 'priority', 'created_at', 'updated_at',
+    'due_date', 'created_by_id', 'assigned_to_id', 'team_id',
+]
+COMMENT_FIELDS = ['id', 'task_id', 'user_id', 'content', 'created_at']
+
+
+def archive_done_tasks(older_than=None, batch_size=None):
+    """Move tasks that have been done for longer than `older_than` into the archive tables.
+
+    Each batch runs in its own transaction, so an interrupted run leaves every task
+    either fully live or fully archived and simply picks up where it stopped next time.
+    Returns the number of tasks archived.
+    """
+    if older_than is None:
+        older_than = settings.TASK_ARCHIVE_AFTER
+    if batch_size is None:
+        batch_size = settings.TASK_ARCHIVE_BATCH_SIZE
+    cutoff = timezone.now() - older_than
+
+    archived = 0
+    while True:
+        with transaction.atomic():
+            tasks = list(
+                Task.objects.select_for_update(skip_locked=True)
+                .filter(status='done', updated_at__lt=cutoff)
+                .order_by('id')
+                .values(*TASK_FIELDS)[:batch_size]
+            )
+            if not tasks:
+                break
+
+            task_ids = [task['id'] for task in tasks]
+            comments = Comment.objects.filter(task_id__in=task_ids).values(*COMMENT_FIELDS)
+
+            ArchivedTask.objects.bulk_create(ArchivedTask(**task) for task in tasks)
+            ArchivedComment.objects.bulk_create(ArchivedComment(**comment) for comment in comments)
+            Comment.objects.filter(task_id__in=task_ids).delete()
+            Task.objects.filter(id__in=task_ids).delete()
+
+        archived += len(tasks)
+        if len(tasks) < batch_size:
+            break
+    return archived
+
+
+@transaction.atomic
+def restore_task(archived_task):
+    """Move an archived task and its comments back into the live tables."""
+    task_data = {field: getattr(archived_task, field) for field in TASK_FIELDS}
+    comment_rows = list(archived_task.comments.values(*COMMENT_FIELDS))
+
+    # created_at is auto_now_add on the live models, so put the original
+    # timestamps back with update() once the rows exist. updated_at is left
+    # as now so the task is not picked up again by the next archive run.
+    task = Task.objects.create(**task_data)
+    Task.objects.filter(id=task.id).update(created_at=task_data['created_at'])
+    task.created_at = task_data['created_at']
+
+    comments = Comment.objects.bulk_create(Comment(**row) for row in comment_rows)
+    for comment, row in zip(comments, comment_rows):
+        comment.created_at = row['created_at']
+    Comment.objects.bulk_update(comments, ['created_at'])
+
+    archived_task.delete()
+    return task
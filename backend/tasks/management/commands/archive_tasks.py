@@ -0,0 +1,21 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from tasks.archive import archive_done_tasks
+
+
+class Command(BaseCommand):
+    help = 'Move long-done tasks and their comments into the archive tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.TASK_ARCHIVE_AFTER.days,
+                            help='Archive tasks that have been done for longer than this many days')
+        parser.add_argument('--batch-size', type=int, default=settings.TASK_ARCHIVE_BATCH_SIZE,
+                            help='Number of tasks moved per transaction')
+
+    def handle(self, *args, **options):
+        count = archive_done_tasks(
+            older_than=timedelta(days=options['days']),
+            batch_size=options['batch_size'],
+        )
+        self.stdout.write(self.style.SUCCESS(f'Archived {count} tasks'))
@@ -0,0 +1,98 @@
+import time
+from datetime import datetime, timedelta, timezone
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+from core import compression
+from core.renderers import ORJSONRenderer
+
+
+def user_payload(user_id):
+    return {
+        'id': user_id,
+        'username': f'user{user_id}',
+        'email': f'user{user_id}@example.com',
+        'first_name': 'First',
+        'last_name': f'Last{user_id}',
+    }
+
+
+def task_rows(count):
+    """Rows shaped like TaskSerializer output for a team of ten members.
+
+    Datetimes stay datetime objects, as DATETIME_FORMAT = None leaves them to the renderer.
+    """
+    members = [user_payload(user_id) for user_id in range(1, 11)]
+    team = {
+        'id': 1,
+        'name': 'Platform',
+        'description': 'Keeps the lights on',
+        'created_at': datetime(2025, 1, 6, 9, 0, tzinfo=timezone.utc),
+        'created_by': members[0],
+        'members': members,
+        'members_count': len(members),
+        'is_admin': True,
+    }
+    start = datetime(2025, 1, 6, 9, 0, tzinfo=timezone.utc)
+    statuses = ['todo', 'in_progress', 'review', 'done']
+    priorities = ['low', 'medium', 'high', 'urgent']
+    rows = []
+    for index in range(count):
+        created_by = members[index % len(members)]
+        assigned_to = members[(index + 3) % len(members)]
+        created_at = start + timedelta(minutes=index, microseconds=index)
+        rows.append({
+            'id': index + 1,
+            'created_by_username': created_by['username'],
+            'assigned_to_name': f"{assigned_to['first_name']} {assigned_to['last_name']}",
+            'team_name': team['name'],
+            'created_by': created_by,
+            'assigned_to': assigned_to,
+            'team': team,
+            'title': f'Task number {index + 1}',
+            'description': 'Investigate the issue, write a fix and add it to the release notes.',
+            'status': statuses[index % len(statuses)],
+            'priority': priorities[index % len(priorities)],
+            'created_at': created_at,
+            'updated_at': created_at,
+            'due_date': created_at + timedelta(days=7) if index % 3 else None,
+        })
+    return rows
+
+
+def best_of(repeat, fn):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best * 1000, result
+
+
+class Command(BaseCommand):
+    help = 'Compare JSON render time and compressed response size for task lists'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000],
+                            help='Task list sizes to benchmark')
+        parser.add_argument('--repeat', type=int, default=5,
+                            help='Runs per measurement, the fastest one is reported')
+
+    def handle(self, *args, **options):
+        renderers = [('json', JSONRenderer()), ('orjson', ORJSONRenderer())]
+
+        for count in options['rows']:
+            rows = task_rows(count)
+            self.stdout.write(self.style.MIGRATE_HEADING(f'{count} tasks'))
+
+            for name, renderer in renderers:
+                ms, body = best_of(options['repeat'], lambda: renderer.render(rows, 'application/json'))
+                self.stdout.write(f'  render {name:<8} {ms:9.2f} ms {len(body):>12,} bytes')
+
+            for encoding in compression.COMPRESSORS:
+                ms, compressed = best_of(options['repeat'], lambda: compression.compress(encoding, body))
+                ratio = len(compressed) / len(body)
+                self.stdout.write(
+                    f'  {encoding:<15} {ms:9.2f} ms {len(compressed):>12,} bytes ({ratio:.1%})'
+                )
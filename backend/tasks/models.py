@@ -28,6 +28,10 @@ class Task(models.Model):
     assigned_to = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='assigned_tasks')
     team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name='tasks')
     
+    class Meta:
+        # Lets the archiver find old done tasks without scanning live work
+        indexes = [models.Index(fields=['status', 'updated_at'])]
+    
     def __str__(self):
         return self.title
 
@@ -39,3 +43,35 @@ class Comment(models.Model):
     
     def __str__(self):
         return f"Comment by {self.user.username} on {self.task.title}"
+
+
+class ArchivedTask(models.Model):
+    """A done task moved out of the hot Task table by tasks.archive.
+
+    Keeps the original primary key so a restored task comes back with the same id.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    title = models.CharField(max_length=200)
+    description = models.TextField(blank=True, null=True)
+    status = models.CharField(max_length=20, choices=Task.STATUS_CHOICES, default='done')
+    priority = models.CharField(max_length=20, choices=Task.PRIORITY_CHOICES, default='medium')
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    due_date = models.DateTimeField(blank=True, null=True)
+    created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_created_tasks')
+    assigned_to = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='archived_assigned_tasks')
+    team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name='archived_tasks')
+    archived_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return self.title
+
+class ArchivedComment(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    task = models.ForeignKey(ArchivedTask, on_delete=models.CASCADE, related_name='comments')
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    content = models.TextField()
+    created_at = models.DateTimeField()
+    
+    def __str__(self):
+        return f"Comment by {self.user.username} on {self.task.title}"
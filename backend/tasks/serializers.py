@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Task, Comment
+from .models import Task, Comment, ArchivedTask, ArchivedComment
 from django.contrib.auth.models import User
 from users.serializers import UserSerializer
 from teams.serializers import TeamSerializer
@@ -63,4 +63,12 @@ class TaskSerializer(serializers.ModelSerializer):
             except Team.DoesNotExist:
                 raise serializers.ValidationError({"team_id": "Team does not exist"})
         
-        return data
\ No newline at end of file
+        return data
+
+class ArchivedCommentSerializer(CommentSerializer):
+    class Meta(CommentSerializer.Meta):
+        model = ArchivedComment
+
+class ArchivedTaskSerializer(TaskSerializer):
+    class Meta(TaskSerializer.Meta):
+        model = ArchivedTask
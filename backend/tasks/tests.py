@@ -1,2 +1,143 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock
+from django.contrib.auth.models import User
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from teams.models import Team, TeamMembership
+from .archive import archive_done_tasks, restore_task
+from .models import Task, Comment, ArchivedTask, ArchivedComment
 
+
+class ArchiveTestMixin:
+    def setUp(self):
+        self.user = User.objects.create_user('alice', password='secret-pass')
+        self.team = Team.objects.create(name='Platform', created_by=self.user)
+        TeamMembership.objects.create(team=self.team, user=self.user, role='admin')
+
+    def create_task(self, status='done', age=timedelta(days=200), created_age=timedelta(days=300), **kwargs):
+        task = Task.objects.create(title='Task', status=status, created_by=self.user, team=self.team, **kwargs)
+        now = timezone.now()
+        Task.objects.filter(id=task.id).update(updated_at=now - age, created_at=now - created_age)
+        task.refresh_from_db()
+        return task
+
+
+class ArchiveDoneTasksTests(ArchiveTestMixin, TestCase):
+    def test_moves_old_done_tasks_with_comments(self):
+        old = self.create_task()
+        Comment.objects.create(task=old, user=self.user, content='Shipped')
+        recent = self.create_task(age=timedelta(days=1))
+        open_task = self.create_task(status='in_progress')
+
+        self.assertEqual(archive_done_tasks(), 1)
+
+        self.assertEqual(set(Task.objects.values_list('id', flat=True)), {recent.id, open_task.id})
+        archived = ArchivedTask.objects.get(id=old.id)
+        self.assertEqual(archived.created_at, old.created_at)
+        self.assertEqual(archived.updated_at, old.updated_at)
+        self.assertEqual(list(archived.comments.values_list('content', flat=True)), ['Shipped'])
+        self.assertFalse(Comment.objects.exists())
+
+    def test_interrupted_run_resumes_from_the_failed_batch(self):
+        tasks = [self.create_task() for _ in range(5)]
+        for task in tasks:
+            Comment.objects.create(task=task, user=self.user, content=f'On {task.id}')
+
+        original_bulk_create = ArchivedComment.objects.bulk_create
+        batches = []
+
+        def fail_second_batch(objs, *args, **kwargs):
+            batches.append(1)
+            if len(batches) == 2:
+                raise RuntimeError('connection lost')
+            return original_bulk_create(objs, *args, **kwargs)
+
+        with mock.patch.object(ArchivedComment.objects, 'bulk_create', side_effect=fail_second_batch):
+            with self.assertRaises(RuntimeError):
+                archive_done_tasks(batch_size=2)
+
+        # The first batch is committed, the failed one rolled back in full
+        self.assertEqual(ArchivedTask.objects.count(), 2)
+        self.assertEqual(ArchivedComment.objects.count(), 2)
+        self.assertEqual(Task.objects.count(), 3)
+        self.assertEqual(Comment.objects.count(), 3)
+
+        self.assertEqual(archive_done_tasks(batch_size=2), 3)
+        self.assertEqual(set(ArchivedTask.objects.values_list('id', flat=True)), {task.id for task in tasks})
+        self.assertEqual(ArchivedComment.objects.count(), 5)
+        self.assertFalse(Task.objects.exists())
+
+    def test_restore_round_trip_keeps_ids_timestamps_and_comments(self):
+        task = self.create_task(description='Details', priority='high')
+        comment = Comment.objects.create(task=task, user=self.user, content='Shipped')
+        Comment.objects.filter(id=comment.id).update(created_at=timezone.now() - timedelta(days=250))
+        comment.refresh_from_db()
+        archive_done_tasks()
+
+        restored = restore_task(ArchivedTask.objects.get(id=task.id))
+
+        restored.refresh_from_db()
+        self.assertEqual(restored.id, task.id)
+        self.assertEqual(restored.created_at, task.created_at)
+        self.assertEqual((restored.title, restored.description, restored.status, restored.priority),
+                         (task.title, task.description, task.status, task.priority))
+        self.assertEqual(restored.team, self.team)
+        restored_comment = Comment.objects.get(task=restored)
+        self.assertEqual(restored_comment.id, comment.id)
+        self.assertEqual(restored_comment.created_at, comment.created_at)
+        self.assertEqual(restored_comment.content, 'Shipped')
+        self.assertFalse(ArchivedTask.objects.exists())
+        self.assertFalse(ArchivedComment.objects.exists())
+
+        # A fresh updated_at keeps the next run from archiving it straight away
+        self.assertEqual(archive_done_tasks(), 0)
+
+
+class ArchivedTaskApiTests(ArchiveTestMixin, TransactionTestCase):
+    # GETs may be routed to a read replica when DATABASE_REPLICA_PATHS is set,
+    # which only sees committed rows
+    databases = '__all__'
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_include_archived_keeps_ordering(self):
+        tasks = [self.create_task(status='done' if index < 3 else 'todo', created_age=timedelta(days=10 - index))
+                 for index in range(5)]
+        archive_done_tasks()
+
+        response = self.client.get('/api/tasks/?ordering=-created_at')
+        self.assertEqual([task['id'] for task in response.json()], [tasks[4].id, tasks[3].id])
+
+        response = self.client.get('/api/tasks/?include_archived=true&ordering=-created_at')
+        self.assertEqual([task['id'] for task in response.json()], [task.id for task in reversed(tasks)])
+
+    def test_comments_list_includes_archived(self):
+        archived = self.create_task()
+        Comment.objects.create(task=archived, user=self.user, content='Old')
+        archive_done_tasks()
+        live = self.create_task(status='todo')
+        Comment.objects.create(task=live, user=self.user, content='New')
+
+        response = self.client.get('/api/tasks/comments/')
+        self.assertEqual([comment['content'] for comment in response.json()], ['New'])
+
+        response = self.client.get('/api/tasks/comments/?include_archived=true')
+        self.assertEqual([comment['content'] for comment in response.json()], ['Old', 'New'])
+
+    def test_archived_task_retrieve_and_restore(self):
+        task = self.create_task()
+        archive_done_tasks()
+
+        self.assertEqual(self.client.get(f'/api/tasks/{task.id}/').status_code, 404)
+        response = self.client.get(f'/api/tasks/{task.id}/?include_archived=true')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['team']['is_admin'])
+
+        response = self.client.post(f'/api/tasks/{task.id}/restore/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['id'], task.id)
+        self.assertEqual(self.client.get(f'/api/tasks/{task.id}/').status_code, 200)
@@ -3,8 +3,9 @@ from rest_framework.routers import DefaultRouter
 from .views import TaskViewSet, CommentViewSet
 
 router = DefaultRouter()
-router.register(r'', TaskViewSet, basename='task')
+# comments goes first, the task detail route on the empty prefix would swallow it otherwise
 router.register(r'comments', CommentViewSet, basename='comment')
+router.register(r'', TaskViewSet, basename='task')
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -1,14 +1,35 @@
 from rest_framework import viewsets, permissions, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.http import Http404
+from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
-from .models import Task, Comment
-from .serializers import TaskSerializer, CommentSerializer
+from .models import Task, Comment, ArchivedTask, ArchivedComment
+from .serializers import TaskSerializer, CommentSerializer, ArchivedTaskSerializer, ArchivedCommentSerializer
+from .archive import restore_task
 from teams.models import TeamMembership
 
+
+def include_archived(request):
+    return request.query_params.get('include_archived', '').lower() in ('true', '1')
+
+def merge_ordered(live, archived, live_data, archived_data, ordering):
+    """Merge live and archived rows with their serialized data, sorted as order_by(*ordering) would"""
+    rows = list(zip(live, live_data)) + list(zip(archived, archived_data))
+    for field in reversed(ordering):
+        name = field.lstrip('-')
+        # Stable sorts from the last field to the first, nulls first like SQLite
+        rows.sort(
+            key=lambda row: (getattr(row[0], name) is not None, getattr(row[0], name)),
+            reverse=field.startswith('-'),
+        )
+    return [data for obj, data in rows]
+
 class TaskViewSet(viewsets.ModelViewSet):
     serializer_class = TaskSerializer
     permission_classes = [permissions.IsAuthenticated]
+    use_read_replica = True
+    coalesce_requests = True
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['status', 'priority', 'team', 'assigned_to']
     search_fields = ['title', 'description']
@@ -19,12 +40,56 @@ class TaskViewSet(viewsets.ModelViewSet):
         user_teams = user.teams.all()
         return Task.objects.filter(team__in=user_teams)
     
+    def get_archived_queryset(self):
+        user_teams = self.request.user.teams.all()
+        return ArchivedTask.objects.filter(team__in=user_teams)
+    
+    def list(self, request, *args, **kwargs):
+        if not include_archived(request):
+            return super().list(request, *args, **kwargs)
+        
+        live = list(self.filter_queryset(self.get_queryset()))
+        archived = list(self.filter_queryset(self.get_archived_queryset()))
+        context = self.get_serializer_context()
+        ordering = filters.OrderingFilter().get_ordering(request, self.get_queryset(), self) or ['id']
+        return Response(merge_ordered(
+            live,
+            archived,
+            self.get_serializer(live, many=True).data,
+            ArchivedTaskSerializer(archived, many=True, context=context).data,
+            ordering,
+        ))
+    
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            return super().retrieve(request, *args, **kwargs)
+        except Http404:
+            if not include_archived(request):
+                raise
+        task = get_object_or_404(self.get_archived_queryset(), pk=kwargs['pk'])
+        return Response(ArchivedTaskSerializer(task, context=self.get_serializer_context()).data)
+    
+    @action(detail=True, methods=['post'])
+    def restore(self, request, pk=None):
+        """Move an archived task back into the active task list"""
+        archived_task = get_object_or_404(self.get_archived_queryset(), pk=pk)
+        task = restore_task(archived_task)
+        serializer = self.get_serializer(task)
+        return Response(serializer.data)
+    
     def perform_create(self, serializer):
         # This is the only place where created_by should be set - yad rakhna dikkat ati hai
         serializer.save(created_by=self.request.user)
     
     @action(detail=True, methods=['get', 'post'])
     def comments(self, request, pk=None):
+        if request.method == 'GET' and include_archived(request):
+            archived_task = self.get_archived_queryset().filter(pk=pk).first()
+            if archived_task:
+                comments = archived_task.comments.order_by('-created_at')
+                serializer = ArchivedCommentSerializer(comments, many=True)
+                return Response(serializer.data)
+        
         task = self.get_object()
         
         if request.method == 'GET':
@@ -60,6 +125,21 @@ class CommentViewSet(viewsets.ModelViewSet):
         user_teams = user.teams.all()
         return Comment.objects.filter(task__team__in=user_teams)
     
+    def list(self, request, *args, **kwargs):
+        if not include_archived(request):
+            return super().list(request, *args, **kwargs)
+        
+        user_teams = request.user.teams.all()
+        live = list(self.filter_queryset(self.get_queryset()))
+        archived = list(self.filter_queryset(ArchivedComment.objects.filter(task__team__in=user_teams)))
+        return Response(merge_ordered(
+            live,
+            archived,
+            self.get_serializer(live, many=True).data,
+            ArchivedCommentSerializer(archived, many=True).data,
+            ['id'],
+        ))
+    
     def perform_create(self, serializer):
         task_id = self.request.data.get('task')
         task = Task.objects.get(id=task_id)
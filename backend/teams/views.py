@@ -8,6 +8,8 @@ from django.contrib.auth.models import User
 class TeamViewSet(viewsets.ModelViewSet):
     serializer_class = TeamSerializer
     permission_classes = [permissions.IsAuthenticated]
+    use_read_replica = True
+    coalesce_requests = True
     
     def get_queryset(self):
         return Team.objects.filter(members=self.request.user)
@@ -12,6 +12,7 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework import status
 from .serializers import UserSerializer, ProfileSerializer
+from core.db_routers import replica_reads
 
 class RegisterView(generics.CreateAPIView):
     queryset = User.objects.all()
@@ -40,6 +41,7 @@ class ProfileView(generics.RetrieveUpdateAPIView):
         return Profile.objects.get(user=self.request.user)
 
 
+@replica_reads
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def search_users(request):